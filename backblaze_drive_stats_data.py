@@ -2,12 +2,33 @@ import argparse
 import json
 import polars
 import pathlib
-import re
 import time
 
 import iceberg_table
 
 
+# Normalization lookups, applied as Polars expressions over the candidate SMART drive model names
+_MODELS_TO_MFRS: dict[str, str] = {
+    r'^ST\d+'       : 'Seagate',
+    r'^WU[HS]72'    : 'WDC/HGST',
+}
+
+_EXPECTED_MFR_STRINGS: frozenset[str] = frozenset(
+    {
+        'WDC/HGST',
+        'Seagate',
+        'Toshiba',
+        'WDC',
+    }
+)
+
+_MFR_NAME_MAPPINGS: dict[str, str] = {
+    "TOSHIBA"   : "Toshiba",
+    "HGST"      : "WDC/HGST",
+    "WDC"       : "WDC/HGST",
+}
+
+
 def source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
     print("\nOpening Polars datasource...")
 
@@ -41,18 +62,11 @@ def source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
 def get_smart_drive_model_mappings(args: argparse.Namespace,
                                    orig_source_lazyframe: polars.LazyFrame) -> polars.DataFrame:
 
-    smart_drive_model_names_series: polars.Series = _get_smart_drive_model_names(args, orig_source_lazyframe)
-    smart_drive_model_mappings_df: polars.DataFrame = smart_drive_model_names_series.to_frame()
-
-    # Add column with normalized drive model name
-    smart_drive_model_mappings_df: polars.DataFrame = smart_drive_model_mappings_df.with_columns(
-        polars.col("drive_model_name_smart").map_batches(_create_normalized_model_name_series,
-                                                         return_dtype=polars.String).alias(
-            "drive_model_name_normalized")
-    )
+    smart_drive_model_names_series: polars.Series = get_smart_drive_model_names(args, orig_source_lazyframe)
+    smart_drive_model_mappings_df: polars.DataFrame = normalize_drive_model_names(smart_drive_model_names_series)
 
     normalized_drive_model_name_count: int = smart_drive_model_mappings_df.get_column(
-        "drive_model_name_normalized" ).unique().len()
+        "drive_model_name_normalized" ).n_unique()
 
     print(f"\t{smart_drive_model_names_series.len()} SMART drive model names -> {normalized_drive_model_name_count} "
         "normalized drive model names" )
@@ -60,17 +74,40 @@ def get_smart_drive_model_mappings(args: argparse.Namespace,
     return smart_drive_model_mappings_df
 
 
-def _get_smart_drive_model_names(args: argparse.Namespace,
-                                original_source_lazyframe: polars.LazyFrame) -> polars.Series:
+def join_smart_drive_model_mappings(orig_source_lazyframe: polars.LazyFrame,
+                                    smart_drive_model_mappings_df: polars.DataFrame) -> polars.LazyFrame:
+
+    return orig_source_lazyframe.filter(
+        # Explicit predicate so it's pushed down into the Iceberg scan; the inner join alone would only drop rows
+        #   for other drive models after they'd been read
+        #   Imploded so is_in gets one list to test membership against (a bare same-dtype Series is deprecated)
+        polars.col("model").is_in(smart_drive_model_mappings_df.get_column("drive_model_name_smart").implode())
+    ).join(
+        smart_drive_model_mappings_df.lazy(),
+        left_on="model",
+        right_on="drive_model_name_smart",
+    )
 
+
+def drive_model_multi_regex(args: argparse.Namespace) -> str:
     with open(args.drive_patterns_json, "r") as json_handle:
         drive_model_patterns: list[str] = json.load(json_handle)
     print(f"\tRetrieved {len(drive_model_patterns):,} regexes for SMART drive model names from "
         f"\"{args.drive_patterns_json}\"")
 
-    multi_regex_pattern: str = "|".join(drive_model_patterns)
+    # Union all patterns into one regex so Polars compiles it once and matches each model name in a single pass.
+    #   Each pattern gets its own non-capturing group so the union can't change how any one of them parses
+    multi_regex_pattern: str = "|".join(f"(?:{curr_pattern})" for curr_pattern in drive_model_patterns)
     # print(f"multi regex pattern: {multi_regex_pattern}")
 
+    return multi_regex_pattern
+
+
+def get_smart_drive_model_names(args: argparse.Namespace,
+                                original_source_lazyframe: polars.LazyFrame) -> polars.Series:
+
+    multi_regex_pattern: str = drive_model_multi_regex(args)
+
     # We want all unique drive model names found in the source file which match one of the drive model regexes
     operation_start: float = time.perf_counter()
     print("\tRetrieving unique candidate SMART drive model names from Polars...")
@@ -78,7 +115,12 @@ def _get_smart_drive_model_names(args: argparse.Namespace,
         polars.col("model").str.contains(multi_regex_pattern)
     ).select(
         "model"
-    ).collect().get_column("model").unique().sort().rename("drive_model_name_smart")
+
+    # Dedupe inside the query so only the few hundred distinct names are materialized, not one per daily row
+    ).unique(
+    ).sort(
+        "model"
+    ).collect(engine="streaming").get_column("model").rename("drive_model_name_smart")
     operation_end: float = time.perf_counter()
     operation_duration: float = operation_end - operation_start
 
@@ -89,58 +131,52 @@ def _get_smart_drive_model_names(args: argparse.Namespace,
     return drive_models_smart_series
 
 
-def _create_normalized_model_name_series( drive_models_name_smart_series: polars.Series ) -> polars.Series:
-    normalized_names: list[str] = []
-    for smart_model_name in drive_models_name_smart_series:
-        normalized_names.append(_normalize_drive_model_name(smart_model_name))
-    model_names_normalized_series: polars.Series = polars.Series("model_name_normalized", normalized_names)
-
-    return model_names_normalized_series
-
+def normalize_drive_model_names(smart_drive_model_names_series: polars.Series) -> polars.DataFrame:
+    # Tokenize to see if we have manufacturer -- runs of non-whitespace, so we get some nice trim and whitespace
+    #   collapse
+    model_tokens: polars.Expr = polars.col("drive_model_name_smart").str.extract_all(r"\S+")
+    model_token_count: polars.Expr = model_tokens.list.len()
+    first_token: polars.Expr = model_tokens.list.first()
 
-def _normalize_drive_model_name(raw_drive_model: str) -> str:
-    # Tokenize to see if we have manufacturer -- split with no params uses multi-whitespace as separator,
-    #   so we get some nice trim and whitespace collapse
-    model_tokens: list[str] = raw_drive_model.split()
-
-    if not 1 <= len(model_tokens) <= 2:
-        raise ValueError(f"Drive model name '{raw_drive_model}' did not result in 1 or 2 tokens")
-
-    models_to_mfrs: dict[str, str] = {
-        r'ST\d+'    : 'Seagate',
-        r'WU[HS]72' : 'WDC/HGST',
-    }
-
-    expected_mfr_strings: set[str] = {
-        'WDC/HGST',
-        'Seagate',
-        'Toshiba',
-        'WDC',
-    }
-
-    # Figure out the manufacturer if there wasn't on00e
-    if len(model_tokens) == 1:
-        for curr_regex in models_to_mfrs:
-            if re.match(curr_regex, model_tokens[0]):
-                return f"{models_to_mfrs[curr_regex]} {model_tokens[0]}"
-
-        # If we get here, we didn't get a match and puke out
-        raise ValueError(f"Cannot determine mfr from model string: {raw_drive_model}")
-
-    # Two token cases
-
-    # Do some mfr name mappings
-    name_mappings: dict[str, str] = {
-        "TOSHIBA"   : "Toshiba",
-        "HGST"      : "WDC/HGST",
-        "WDC"       : "WDC/HGST",
-    }
-    if model_tokens[0] in name_mappings:
-        model_tokens[0] = name_mappings[model_tokens[0]]
+    # Figure out the manufacturer if there wasn't one (first matching regex wins)
+    mfr_from_model: polars.Expr = polars.coalesce(
+        polars.when(first_token.str.contains(curr_regex)).then(polars.lit(curr_mfr))
+        for curr_regex, curr_mfr in _MODELS_TO_MFRS.items()
+    )
 
-    if model_tokens[0] not in expected_mfr_strings:
-        raise ValueError(f"Drive mfr {model_tokens[0]} not recognized")
+    # Two token cases: do some mfr name mappings
+    mapped_mfr: polars.Expr = first_token.replace(_MFR_NAME_MAPPINGS)
+
+    # Anything that doesn't fall into one of the recognized cases is left null
+    smart_drive_model_mappings_df: polars.DataFrame = smart_drive_model_names_series.to_frame().with_columns(
+        polars.when(
+            model_token_count == 1
+        ).then(
+            polars.concat_str(mfr_from_model, polars.lit(" "), first_token)
+        ).when(
+            (model_token_count == 2) & mapped_mfr.is_in(list(_EXPECTED_MFR_STRINGS))
+        ).then(
+            polars.concat_str(mapped_mfr, polars.lit(" "), model_tokens.list.last())
+        ).alias(
+            "drive_model_name_normalized"
+        )
+    )
 
-    normalized_drive_model_name: str = " ".join(model_tokens)
+    unrecognized_drive_model_names: list[str] = smart_drive_model_mappings_df.filter(
+        polars.col("drive_model_name_normalized").is_null()
+    ).get_column("drive_model_name_smart").to_list()
+
+    if unrecognized_drive_model_names:
+        raise ValueError(f"Cannot determine normalized mfr/model for drive model names: "
+                         f"{unrecognized_drive_model_names}")
+
+    # The normalized name gets attached to every daily row of the source table and is then a join/group_by key, so
+    #   carry it as an Enum (small integer codes) rather than as a repeated string. Categories are sorted, so
+    #   sorting on the column stays alphabetical
+    smart_drive_model_mappings_df = smart_drive_model_mappings_df.with_columns(
+        polars.col("drive_model_name_normalized").cast(
+            polars.Enum(smart_drive_model_mappings_df.get_column("drive_model_name_normalized").unique().sort())
+        )
+    )
 
-    return normalized_drive_model_name
+    return smart_drive_model_mappings_df
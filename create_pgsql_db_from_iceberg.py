@@ -3,6 +3,7 @@ import os
 import polars
 import psycopg2
 import psycopg2.extensions
+import psycopg2.extras
 
 import backblaze_drive_stats_data
 
@@ -51,70 +52,87 @@ def _db_connect():
                             f"host='{db_details['db_host']}' password='{db_details['db_password']}'")
 
 
-def _find_and_add_drives(source_lazyframe: polars.LazyFrame,
-                         db_cursor: psycopg2.extensions.cursor) -> None:
-
-    db_cursor.execute(
-        "SELECT drive_model_name_smart, drive_model_id_pk FROM drive_models;"
-    )
-    drive_model_smart_to_model_ids: list[dict[str, str]] = []
-    for curr_row in db_cursor:
-        drive_model_smart_to_model_ids.append(
-            {
-                "drive_model_smart": curr_row[0],
-                "drive_model_id": curr_row[1]
-            }
-        )
-    drive_model_name_ids: polars.DataFrame = polars.from_dicts(drive_model_smart_to_model_ids)
-
-    drives_dataframe: polars.DataFrame = source_lazyframe.group_by(
+def _drives_lazyframe(source_lazyframe: polars.LazyFrame) -> polars.LazyFrame:
+    return source_lazyframe.group_by(
         "serial_number"
     ).agg(
         polars.col("model").mode().first().alias("drive_model_smart"),
-    ).collect().join(
-        drive_model_name_ids,
-        on="drive_model_smart",
     )
 
-    for serial_number, _, drive_model_id in drives_dataframe.iter_rows():
-        db_cursor.execute(
-            "INSERT INTO drives (drive_model_fk, drive_serial_number) VALUES (%s, %s);",
-            (drive_model_id, serial_number)
-        )
-
 
-def _find_and_add_drive_models(source_lazyframe: polars.LazyFrame,
-                               db_cursor: psycopg2.extensions.cursor) -> None:
-
-    drive_model_dataframe: polars.DataFrame = source_lazyframe.group_by(
+def _drive_models_lazyframe(source_lazyframe: polars.LazyFrame) -> polars.LazyFrame:
+    return source_lazyframe.group_by(
         "model"
     ).agg(
         polars.col("capacity_bytes").mode().first().alias("capacity_bytes_mode"),
     ).select(
         polars.col("model").alias("drive_model_smart"),
         ( polars.col("capacity_bytes_mode") / 1000 / 1000 / 1000 / 1000 ).alias("capacity_tb"),
-    ).collect()
+    )
 
-    for drive_model_name_smart, drive_model_capacity_tb in drive_model_dataframe.iter_rows():
-        db_cursor.execute(
-            "INSERT INTO drive_models (drive_model_name_smart, drive_model_size_tb) VALUES (%s, %s);",
-            (drive_model_name_smart, drive_model_capacity_tb)
-        )
+
+def _find_and_add_drives(drives_dataframe: polars.DataFrame,
+                         db_cursor: psycopg2.extensions.cursor) -> None:
+
+    db_cursor.execute(
+        "SELECT drive_model_name_smart, drive_model_id_pk FROM drive_models;"
+    )
+    # Build the lookup frame straight from the row tuples rather than going through a dict per row
+    drive_model_name_ids: polars.DataFrame = polars.DataFrame(
+        db_cursor.fetchall(),
+        schema=["drive_model_smart", "drive_model_id"],
+        orient="row",
+    )
+
+    drives_dataframe = drives_dataframe.join(
+        drive_model_name_ids,
+        on="drive_model_smart",
+    )
+
+    # Multi-row INSERTs rather than one round trip to the server per drive
+    psycopg2.extras.execute_values(
+        db_cursor,
+        "INSERT INTO drives (drive_model_fk, drive_serial_number) VALUES %s;",
+        drives_dataframe.select("drive_model_id", "serial_number").iter_rows(),
+        page_size=10_000,
+    )
+
+
+def _find_and_add_drive_models(drive_model_dataframe: polars.DataFrame,
+                               db_cursor: psycopg2.extensions.cursor) -> None:
+
+    psycopg2.extras.execute_values(
+        db_cursor,
+        "INSERT INTO drive_models (drive_model_name_smart, drive_model_size_tb) VALUES %s;",
+        drive_model_dataframe.iter_rows(),
+        page_size=10_000,
+    )
 
 
 def _main() -> None:
     args: argparse.Namespace = _parse_args()
     source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args)
 
+    # Both aggregates come off the same Iceberg scan, so collect them together and let Polars share it
+    drive_model_dataframe: polars.DataFrame
+    drives_dataframe: polars.DataFrame
+    drive_model_dataframe, drives_dataframe = polars.collect_all(
+        [
+            _drive_models_lazyframe(source_lazyframe),
+            _drives_lazyframe(source_lazyframe),
+        ],
+        engine="streaming",
+    )
+
     # Connect to PGSQL
     with _db_connect() as db_handle:
         with db_handle.cursor() as db_cursor:
 
-            # Get and add all models
-            _find_and_add_drive_models(source_lazyframe, db_cursor)
+            # Add all models
+            _find_and_add_drive_models(drive_model_dataframe, db_cursor)
 
-            # Get and add all drives
-            _find_and_add_drives(source_lazyframe, db_cursor)
+            # Add all drives (needs the model IDs assigned by the insert above)
+            _find_and_add_drives(drives_dataframe, db_cursor)
 
             # Get daily info and add it
 
@@ -1,6 +1,5 @@
 import argparse
 import datetime
-import json
 import time
 import polars
 
@@ -44,16 +43,12 @@ def _parse_args() -> argparse.Namespace:
 
 
 def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
-    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
-    with open(args.drive_patterns_json, "r") as json_handle:
-        drive_model_patterns: list[str] = json.load(json_handle)
-    print(f"\nRetrieved {len(drive_model_patterns):,} regexes for SMART drive model names from "
-        f"\"{args.drive_patterns_json}\"")
+    source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args)
 
-    multi_regex_pattern: str = "|".join(drive_model_patterns)
-    # print(f"multi regex pattern: {multi_regex_pattern}")
+    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
+    multi_regex_pattern: str = backblaze_drive_stats_data.drive_model_multi_regex(args)
 
-    lf: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args).select(
+    lf: polars.LazyFrame = source_lazyframe.select(
         polars.col("model").alias("model_name"),
         polars.col("date")
     ).filter(
@@ -122,7 +117,7 @@ def _get_date_ranges_per_drive_model(original_source_lazyframe: polars.LazyFrame
         "first_seen",
         "drive_model",
         descending=[True, False],
-    ).collect()
+    ).collect(engine="streaming")
 
     operation_end: float = time.perf_counter()
     operation_duration: float = operation_end - operation_start
@@ -152,17 +147,17 @@ def _main() -> None:
     ).item()
 
     prev_first_seen: str | None = None
-    for curr_drive_model_row in date_ranges_per_drive_model.iter_rows(named=True):
-        if curr_drive_model_row['first_seen'] != prev_first_seen:
-            print(f"\n\t{curr_drive_model_row['first_seen']}")
-            prev_first_seen = curr_drive_model_row['first_seen']
+    for drive_model, first_seen, last_seen, last_seen_date in date_ranges_per_drive_model.iter_rows():
+        if first_seen != prev_first_seen:
+            print(f"\n\t{first_seen}")
+            prev_first_seen = first_seen
 
-        if curr_drive_model_row['last_seen_date'] == drive_still_deployed_date:
+        if last_seen_date == drive_still_deployed_date:
             drive_last_seen_str = "(currently deployed)"
         else:
-            drive_last_seen_str = f"(removed from use: {curr_drive_model_row['last_seen']})"
+            drive_last_seen_str = f"(removed from use: {last_seen})"
 
-        mfr, model = curr_drive_model_row['drive_model'].split(" ")
+        mfr, model = drive_model.split(" ")
 
         print(f"\t\t{mfr:8} {model:16} {drive_last_seen_str}")
 
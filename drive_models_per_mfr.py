@@ -1,6 +1,5 @@
 import argparse
 import datetime
-import json
 import time
 import polars
 
@@ -44,16 +43,12 @@ def _parse_args() -> argparse.Namespace:
 
 
 def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
-    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
-    with open(args.drive_patterns_json, "r") as json_handle:
-        drive_model_patterns: list[str] = json.load(json_handle)
-    print(f"\nRetrieved {len(drive_model_patterns):,} regexes for SMART drive model names from "
-        f"\"{args.drive_patterns_json}\"")
+    source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args)
 
-    multi_regex_pattern: str = "|".join(drive_model_patterns)
-    # print(f"multi regex pattern: {multi_regex_pattern}")
+    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
+    multi_regex_pattern: str = backblaze_drive_stats_data.drive_model_multi_regex(args)
 
-    return backblaze_drive_stats_data.source_lazyframe(args).select(
+    return source_lazyframe.select(
         polars.col("model").alias("model_name"),
         polars.col("date")
     ).filter(
@@ -103,6 +98,16 @@ def _get_models_per_mfr(lf: polars.LazyFrame) -> polars.DataFrame:
 
     models_per_mfr: polars.DataFrame = _add_mfr_and_model_columns(
         lf
+
+    # Now regroup by normalized columns, still on dates so the quarter strings are only built once per output row
+    ).group_by(
+        "drive_model_normalized_mfr",
+        "drive_model_normalized_model",
+    ).agg(
+        polars.col("first_seen_date").min(),
+        polars.col("last_seen_date").max(),
+        # polars.col("deployed_currently").any().alias("deployed_currently_agg"),
+
     # Add columns for min/max quarter
     ).with_columns(
         polars.concat_str(
@@ -111,7 +116,7 @@ def _get_models_per_mfr(lf: polars.LazyFrame) -> polars.DataFrame:
                 polars.col("first_seen_date").dt.quarter(),
             ],
             separator=" Q"
-        ).alias("first_seen"),
+        ).alias("first_seen_normalized"),
 
         polars.concat_str(
             [
@@ -119,16 +124,8 @@ def _get_models_per_mfr(lf: polars.LazyFrame) -> polars.DataFrame:
                 polars.col("last_seen_date").dt.quarter(),
             ],
             separator=" Q"
-        ).alias("last_seen")
+        ).alias("last_seen_normalized"),
 
-    # Now regroup by normalized columns
-    ).group_by(
-        "drive_model_normalized_mfr",
-        "drive_model_normalized_model",
-    ).agg(
-        polars.col("first_seen").min().alias("first_seen_normalized"),
-        polars.col("last_seen").max().alias("last_seen_normalized"),
-        # polars.col("deployed_currently").any().alias("deployed_currently_agg"),
     # Filter down to just the columns we care about
     ).select(
         "drive_model_normalized_mfr",
@@ -145,7 +142,7 @@ def _get_models_per_mfr(lf: polars.LazyFrame) -> polars.DataFrame:
         descending=[False, True, True, False]
     ).with_columns(
         (polars.col("last_seen") == polars.col("last_seen").max()).alias("deployed_currently")
-    ).collect()
+    ).collect(engine="streaming")
 
     operation_end: float = time.perf_counter()
     operation_duration: float = operation_end - operation_start
@@ -158,22 +155,22 @@ def _get_models_per_mfr(lf: polars.LazyFrame) -> polars.DataFrame:
 def _display_output(drive_per_mfr: polars.DataFrame) -> None:
     prev_mfr: str | None = None
     prev_first_seen: str | None = None
-    for drive_per_mfr_row in drive_per_mfr.iter_rows(named=True):
-        if drive_per_mfr_row['drive_model_normalized_mfr'] != prev_mfr:
-            print(f"\n{drive_per_mfr_row['drive_model_normalized_mfr']}")
-            prev_mfr = drive_per_mfr_row['drive_model_normalized_mfr']
+    for drive_mfr, first_seen, last_seen, drive_model, deployed_currently in drive_per_mfr.iter_rows():
+        if drive_mfr != prev_mfr:
+            print(f"\n{drive_mfr}")
+            prev_mfr = drive_mfr
             prev_first_seen = None
 
-        if drive_per_mfr_row['first_seen'] != prev_first_seen:
-            print(f"\n\t{drive_per_mfr_row['first_seen']}")
-            prev_first_seen = drive_per_mfr_row['first_seen']
+        if first_seen != prev_first_seen:
+            print(f"\n\t{first_seen}")
+            prev_first_seen = first_seen
 
-        if drive_per_mfr_row['deployed_currently']:
+        if deployed_currently:
             deployed_str = "currently deployed"
         else:
-            deployed_str = f"last seen: {drive_per_mfr_row['last_seen']}"
+            deployed_str = f"last seen: {last_seen}"
 
-        print(f"\t\t{drive_per_mfr_row['drive_model_normalized_model']:16} ({deployed_str})")
+        print(f"\t\t{drive_model:16} ({deployed_str})")
 
 
 def _main() -> None:
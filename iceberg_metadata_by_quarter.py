@@ -10,6 +10,9 @@ import s3fs
 import iceberg_table
 
 
+_METADATA_FETCH_BATCH_SIZE: int = 64
+
+
 def _parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Metadata versions/dates per qtr")
@@ -62,24 +65,6 @@ def _bin_metadata_by_qtr(b2_access_key: str,
         },
     )
 
-    quarter_lookup_table: dict[int, int] = {
-         1: 1,
-         2: 1,
-         3: 1,
-
-         4: 2,
-         5: 2,
-         6: 2,
-
-         7: 3,
-         8: 3,
-         9: 3,
-
-        10: 4,
-        11: 4,
-        12: 4,
-    }
-
     # Initialize binned metadata from program state
     if program_state is not None and 'binned_metadata' in program_state:
         binned_metadata: dict[str, set[datetime.date]] = program_state['binned_metadata']
@@ -99,40 +84,37 @@ def _bin_metadata_by_qtr(b2_access_key: str,
     else:
         binned_metadata: dict[str, set[datetime.date]] = {}
 
-    # Crack each JSON metadata open and read its contents
-    printed_search_string: bool = False
+    if metadata_files:
+        print("Pulling update date for all metadata files that exist:")
 
-    for metadata_file in metadata_files:
-        if not printed_search_string:
-            print("Pulling update date for all metadata files that exist:")
-            printed_search_string = True
+    # Crack each JSON metadata open and read its contents. Each metadata file carries the full snapshot history, so
+    #   they grow with every version; fetch a bounded batch at a time rather than the whole history at once. Handing
+    #   s3fs a list still lets it issue the GETs within a batch concurrently
+    for batch_start in range(0, len(metadata_files), _METADATA_FETCH_BATCH_SIZE):
+        metadata_file_batch: list[str] = metadata_files[batch_start:batch_start + _METADATA_FETCH_BATCH_SIZE]
+        metadata_contents: dict[str, bytes] = s3_handle.cat(metadata_file_batch)
 
-        base_filename: str = pathlib.Path(metadata_file).name
-
-        # Read from S3
-        with s3_handle.open(f"s3://{metadata_file}") as s3_file:
-            metadata_content = s3_file.read()
-        parsed_metadata = json.loads(metadata_content)
+        for metadata_file in metadata_file_batch:
+            base_filename: str = pathlib.Path(metadata_file).name
 
-        metadata_file_date: datetime.date = datetime.datetime.fromtimestamp(
-            parsed_metadata["last-updated-ms"] / 1000.0 ).date()
+            parsed_metadata = json.loads(metadata_contents.pop(metadata_file))
 
-        print(f"\t{base_filename}: {metadata_file_date.isoformat()}")
+            metadata_file_date: datetime.date = datetime.datetime.fromtimestamp(
+                parsed_metadata["last-updated-ms"] / 1000.0 ).date()
 
-        quarter_number: int = quarter_lookup_table[metadata_file_date.month]
+            print(f"\t{base_filename}: {metadata_file_date.isoformat()}")
 
-        qtr_str: str = f"{metadata_file_date.year} Q{quarter_number}"
-        # print(f"Date {metadata_file_date.isoformat()} has quarter {qtr_str}")
+            quarter_number: int = (metadata_file_date.month - 1) // 3 + 1
 
-        if qtr_str not in binned_metadata:
-            binned_metadata[qtr_str] = set()
+            qtr_str: str = f"{metadata_file_date.year} Q{quarter_number}"
+            # print(f"Date {metadata_file_date.isoformat()} has quarter {qtr_str}")
 
-        binned_metadata[qtr_str].add( metadata_file_date )
+            binned_metadata.setdefault(qtr_str, set()).add( metadata_file_date )
 
-        if program_state is not None:
-            if 'latest_metadata_version' not in program_state or \
-                    base_filename[:5] > program_state['latest_metadata_version']:
-                program_state['latest_metadata_version'] = base_filename[:5]
+            if program_state is not None:
+                if 'latest_metadata_version' not in program_state or \
+                        base_filename[:5] > program_state['latest_metadata_version']:
+                    program_state['latest_metadata_version'] = base_filename[:5]
 
     if program_state is not None:
         program_state['binned_metadata'] = binned_metadata
@@ -149,11 +131,12 @@ def _main() -> None:
         if pathlib.Path(args.state_file).exists():
             with open(args.state_file) as f:
                 program_state = json.load(f)
-                for curr_qtr_str in program_state['binned_metadata']:
-                    # Convert date strings to datetime objects
-                    for date_index, _  in enumerate(program_state['binned_metadata'][curr_qtr_str]):
-                        program_state['binned_metadata'][curr_qtr_str][date_index] = \
-                            datetime.date.fromisoformat(program_state['binned_metadata'][curr_qtr_str][date_index])
+                # Convert date strings to date objects, building each quarter's set in one pass (binning adds
+                #   to these, so they need to be sets rather than the lists JSON hands back)
+                program_state['binned_metadata'] = {
+                    curr_qtr_str: {datetime.date.fromisoformat(curr_date_str) for curr_date_str in curr_date_strs}
+                    for curr_qtr_str, curr_date_strs in program_state['binned_metadata'].items()
+                }
                 print(f"\nRead state for metadata versions up to {program_state['latest_metadata_version']}")
 
         else:
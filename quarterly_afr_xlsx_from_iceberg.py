@@ -1,19 +1,17 @@
 import argparse
 import boto3
-import json
-import pathlib
+import io
 import polars
-import re
-import tempfile
 import time
 import typing
 import xlsxwriter
 
-import iceberg_table
+import backblaze_drive_stats_data
 
 
 type XlsxVizDataPerDriveModelQuarterType = dict[str, dict[str, list[dict[str, str | int | float]]]]
 
+
 def _parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Create quarterly AFR visualization CSV")
@@ -57,117 +55,25 @@ def _parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def _normalize_drive_model_name(raw_drive_model: str) -> str:
-    # Tokenize to see if we have manufacturer -- split with no params uses multi-whitespace as separator,
-    #   so we get some nice trim and whitespace collapse
-    model_tokens: list[str] = raw_drive_model.split()
-
-    if not 1 <= len(model_tokens) <= 2:
-        raise ValueError(f"Drive model name '{raw_drive_model}' did not result in 1 or 2 tokens")
-
-    models_to_mfrs: dict[str, str] = {
-        r'ST\d+'    : 'Seagate',
-        r'WU[HS]72' : 'WDC/HGST',
-    }
-
-    expected_mfr_strings: set[str] = {
-        'WDC/HGST',
-        'Seagate',
-        'Toshiba',
-        'WDC',
-    }
-
-    # Figure out the manufacturer if there wasn't on00e
-    if len(model_tokens) == 1:
-        for curr_regex in models_to_mfrs:
-            if re.match(curr_regex, model_tokens[0]):
-                return f"{models_to_mfrs[curr_regex]} {model_tokens[0]}"
-
-        # If we get here, we didn't get a match and puke out
-        raise ValueError(f"Cannot determine mfr from model string: {raw_drive_model}")
-
-    # Two token cases
-
-    # Do some mfr name mappings
-    name_mappings: dict[str, str] = {
-        "TOSHIBA"   : "Toshiba",
-        "HGST"      : "WDC/HGST",
-        "WDC"       : "WDC/HGST",
-    }
-    if model_tokens[0] in name_mappings:
-        model_tokens[0] = name_mappings[model_tokens[0]]
-
-    if model_tokens[0] not in expected_mfr_strings:
-        raise ValueError(f"Drive mfr {model_tokens[0]} not recognized")
-
-    normalized_drive_model_name: str = " ".join(model_tokens)
-
-    return normalized_drive_model_name
-
-
-def _source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
-    print("\nOpening Polars datasource...")
-
-    # Let's try some Iceberg magic
-    current_iceberg_schema_uri: str = iceberg_table.current_metadata_file_s3_uri(
-        args.b2_access_key,
-        args.b2_secret_access_key,
-        args.s3_endpoint,
-        args.bucket_name,
-        args.table_path
-    )
-
-    base_filename: str = pathlib.Path(current_iceberg_schema_uri).name
-
-    print(f"\tCurrent Backblaze Drive Stats Iceberg schema file: {base_filename}")
-    print(f"\t\tSchema URI: {current_iceberg_schema_uri}")
-
-    storage_options = {
-        "s3.endpoint"           : args.s3_endpoint,
-        "s3.region"             : args.b2_region,
-        "s3.access-key-id"      : args.b2_access_key,
-        "s3.secret-access-key"  : args.b2_secret_access_key,
-    }
-
-    source_lazyframe: polars.LazyFrame = polars.scan_iceberg(current_iceberg_schema_uri, 
-                                                             storage_options=storage_options)
-
-    return source_lazyframe
-
-
-def _afr_calc(cumulative_drive_days: int, cumulative_drive_failures: int) -> float:
+def _afr_calc(cumulative_drive_days: polars.Expr, cumulative_drive_failures: polars.Expr) -> polars.Expr:
     # Scaling factor is 365 unit-days / year
     afr_scaling_factor: float = 365.0
 
-    annualized_failure_rate_percent: float = ( float(cumulative_drive_failures) / float(cumulative_drive_days) ) * \
-                                             afr_scaling_factor * 100.0
+    annualized_failure_rate_percent: polars.Expr = ( cumulative_drive_failures / cumulative_drive_days ) * \
+                                                   afr_scaling_factor * 100.0
 
     return annualized_failure_rate_percent
 
 
-def _create_normalized_model_name_series( drive_models_name_smart_series: polars.Series ) -> polars.Series:
-    normalized_names: list[str] = []
-    for smart_model_name in drive_models_name_smart_series:
-        normalized_names.append(_normalize_drive_model_name(smart_model_name))
-    model_names_normalized_series: polars.Series = polars.Series("model_name_normalized", normalized_names)
-
-    return model_names_normalized_series
-
-
 def _get_smart_drive_model_mappings(smart_drive_model_names_series: polars.Series) -> polars.DataFrame:
     print("\nETL pipeline stage 2 of 5: Create mapping table for SMART model name -> normalized model name...")
 
-    smart_drive_model_mappings_df: polars.DataFrame = smart_drive_model_names_series.to_frame()
-
     # Add column with normalized drive model name
-    smart_drive_model_mappings_df: polars.DataFrame = smart_drive_model_mappings_df.with_columns(
-        polars.col("drive_model_name_smart").map_batches(_create_normalized_model_name_series,
-                                                         return_dtype=polars.String).alias(
-            "drive_model_name_normalized")
-    )
+    smart_drive_model_mappings_df: polars.DataFrame = backblaze_drive_stats_data.normalize_drive_model_names(
+        smart_drive_model_names_series)
 
     normalized_drive_model_name_count: int = smart_drive_model_mappings_df.get_column(
-        "drive_model_name_normalized" ).unique().len()
+        "drive_model_name_normalized" ).n_unique()
 
     print(f"\t{smart_drive_model_names_series.len()} SMART drive model names -> {normalized_drive_model_name_count} "
         "normalized drive model names" )
@@ -175,68 +81,74 @@ def _get_smart_drive_model_mappings(smart_drive_model_names_series: polars.Serie
     return smart_drive_model_mappings_df
 
 
-def _get_smart_drive_model_names(args: argparse.Namespace,
-                                original_source_lazyframe: polars.LazyFrame) -> polars.Series:
-
-    print("\nETL pipeline stage 1 of 5: Retrieve candidate SMART drive model names...")
-
-    with open(args.drive_patterns_json, "r") as json_handle:
-        drive_model_patterns: list[str] = json.load(json_handle)
-    print(f"\tRetrieved {len(drive_model_patterns):,} regexes for SMART drive model names from "
-        f"\"{args.drive_patterns_json}\"")
+def _drive_model_daily_lazyframe(source_lazyframe: polars.LazyFrame,
+                                 smart_model_name_mappings_dataframe: polars.DataFrame) -> polars.LazyFrame:
 
-    multi_regex_pattern: str = "|".join(drive_model_patterns)
-    # print(f"multi regex pattern: {multi_regex_pattern}")
+    # One definition of the daily rows for drive models of interest, shared by stages 3 and 4
+    return backblaze_drive_stats_data.join_smart_drive_model_mappings(
+        source_lazyframe, smart_model_name_mappings_dataframe
 
-    # We want all unique drive model names found in the source file which match one of the drive model regexes
-    operation_start: float = time.perf_counter()
-    print("\tRetrieving unique candidate SMART drive model names from Polars...")
-    drive_models_smart_series: polars.Series = original_source_lazyframe.filter(
-        polars.col("model").str.contains(multi_regex_pattern)
+    # Swap the SMART model name for the normalized one
     ).select(
-        "model"
-    ).collect().get_column("model").unique().sort().rename("drive_model_name_smart")
-    operation_end: float = time.perf_counter()
-    operation_duration: float = operation_end - operation_start
+        polars.col("drive_model_name_normalized").alias("model_name"),
+        "date",
+        "serial_number",
+        "failure",
+    )
 
-    # How many unique drive models and how much time?
-    print( f"\t\tRetrieved {len(drive_models_smart_series):,} candidate SMART drive model names in "
-        f"{operation_duration:.01f} seconds")
 
-    return drive_models_smart_series
+def _year_quarter_key(date_expr: polars.Expr) -> polars.Expr:
+    # One integer per quarter (year * 4 + quarter - 1), so quarterly group_bys and joins key on a single column
+    return date_expr.dt.year() * 4 + date_expr.dt.quarter() - 1
 
 
 def _do_quarterly_afr_calculations(
-        source_lazyframe: polars.LazyFrame,
-        smart_model_name_mappings_dataframe: polars.DataFrame ) -> polars.DataFrame:
+        drive_model_daily_lazyframe: polars.LazyFrame ) -> tuple[polars.DataFrame, polars.DataFrame]:
 
     print("\nETL pipeline stage 3 of 5: Perform AFR calculations...")
 
     operation_start: float = time.perf_counter()
 
-    quarterly_afr_calc_data: polars.DataFrame = source_lazyframe.join(
-        smart_model_name_mappings_dataframe.lazy(),
-        left_on="model",
-        right_on="drive_model_name_smart",
-    ).group_by(
-        polars.col("drive_model_name_normalized").alias("model_name"),
-        polars.col("date").dt.year().alias("year"),
-        polars.col("date").dt.quarter().alias("quarter")
+    quarterly_afr_calc_lazyframe: polars.LazyFrame = drive_model_daily_lazyframe.group_by(
+        "model_name",
+        _year_quarter_key(polars.col("date")).alias("year_quarter_key"),
     ).agg(
         polars.col("failure").sum().alias("qtr_failure_count"),
         polars.col("failure").count().alias("qtr_drive_days"),
-        polars.col("serial_number").unique().len().alias("qtr_unique_drives_deployed"),
+        polars.col("serial_number").n_unique().alias("qtr_unique_drives_deployed"),
     ).select(
         "model_name",
-        "year",
-        "quarter",
+        "year_quarter_key",
+        (polars.col("year_quarter_key") // 4).alias("year"),
+        (polars.col("year_quarter_key") % 4 + 1).alias("quarter"),
         "qtr_unique_drives_deployed",
         "qtr_drive_days",
         "qtr_failure_count"
-    ).collect().sort(
+    ).sort(
         "model_name",
-        "year",
-        "quarter"
+        "year_quarter_key",
+    )
+
+    # First/last day each drive was seen, used by stage 4 for quarterly deploys/removals
+    drives_deployed_removed_dates_lazyframe: polars.LazyFrame = drive_model_daily_lazyframe.group_by(
+        "model_name",
+        "serial_number",
+    ).agg(
+        polars.col("date").min().alias("first_seen"),
+        polars.col("date").max().alias("last_seen")
+    )
+
+    # Both aggregations read the same filtered daily rows, so collect them together and let Polars scan the
+    #   Iceberg table once for both. Streaming engine runs the scan -> join -> group_by in batches across all
+    #   cores instead of first materializing every joined daily row
+    quarterly_afr_calc_data: polars.DataFrame
+    drives_deployed_removed_dates: polars.DataFrame
+    quarterly_afr_calc_data, drives_deployed_removed_dates = polars.collect_all(
+        [
+            quarterly_afr_calc_lazyframe,
+            drives_deployed_removed_dates_lazyframe,
+        ],
+        engine="streaming",
     )
 
     # print(json.dumps(afr_by_mfr_model_quarter, indent=4, sort_keys=True))
@@ -244,7 +156,7 @@ def _do_quarterly_afr_calculations(
     operation_duration: float = time.perf_counter() - operation_start
     print(f"\tOperation time: {operation_duration:.01f} seconds")
 
-    return quarterly_afr_calc_data
+    return quarterly_afr_calc_data, drives_deployed_removed_dates
 
 
 def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterType,
@@ -353,12 +265,10 @@ def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterT
     }
 
     # Compute number of drive models for each manufacturer
-    drive_models_per_mfr: dict[str, int] = {}
-    for curr_mfr in sorted(afr_by_mfr_model_qtr):
-        for _ in sorted(list(afr_by_mfr_model_qtr[curr_mfr])):
-            if curr_mfr not in drive_models_per_mfr:
-                drive_models_per_mfr[curr_mfr] = 0
-            drive_models_per_mfr[curr_mfr] += 1
+    drive_models_per_mfr: dict[str, int] = {
+        curr_mfr: len(curr_mfr_models) for curr_mfr, curr_mfr_models in afr_by_mfr_model_qtr.items()
+        if curr_mfr_models
+    }
 
     # Year (A1:A5)
     excel_sheet.merge_range(
@@ -386,7 +296,7 @@ def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterT
 
     # Create cells for all the mfrs along row 2
     curr_col: int = 2
-    for curr_mfr in sorted(drive_models_per_mfr):
+    for curr_mfr in drive_models_per_mfr:
         cols_for_this_mfr: int = drive_models_per_mfr[curr_mfr] * cols_per_drive_model
         excel_sheet.merge_range(
             1, curr_col, 1, curr_col + cols_for_this_mfr - 1,
@@ -398,8 +308,8 @@ def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterT
 
     # Create row of drive models for each mfr
     curr_col = 2
-    for curr_mfr in sorted(afr_by_mfr_model_qtr):
-        for curr_model in sorted(afr_by_mfr_model_qtr[curr_mfr]):
+    for curr_mfr in afr_by_mfr_model_qtr:
+        for curr_model in afr_by_mfr_model_qtr[curr_mfr]:
             excel_sheet.merge_range(
                 2, curr_col, 2, curr_col + cols_per_drive_model - 1,
                 curr_model,
@@ -409,7 +319,7 @@ def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterT
 
     # Write "AFR" and "Deploy Count" for each drive model
     curr_col = 2
-    for curr_mfr in sorted(drive_models_per_mfr):
+    for curr_mfr in drive_models_per_mfr:
         for _ in range(drive_models_per_mfr[curr_mfr]):
             excel_sheet.merge_range(
                 3, curr_col, 3, curr_col + 1,
@@ -427,7 +337,7 @@ def _xlsx_add_header_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterT
     curr_col = 2
 
     # Each drive model gets two sets of Value/Delta, one for AFR, one for Deploy Count
-    for curr_mfr in sorted(drive_models_per_mfr):
+    for curr_mfr in drive_models_per_mfr:
         for _ in range(drive_models_per_mfr[curr_mfr]):
             excel_sheet.write(4, curr_col, "Value", mfr_right_format[curr_mfr] )
             excel_sheet.write(4, curr_col + 1, "Delta", mfr_right_format[curr_mfr] )
@@ -447,8 +357,6 @@ def _xlsx_add_data_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterTyp
                         excel_workbook: xlsxwriter.workbook.Workbook,
                         excel_sheet: xlsxwriter.workbook.Worksheet ) -> None:
 
-    curr_year_quarter: tuple[int, int]
-
     curr_col: int = 2
     curr_row: int
 
@@ -479,15 +387,13 @@ def _xlsx_add_data_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterTyp
 
     cols_per_drive_model: int = 7
 
-    for curr_mfr in sorted(afr_by_mfr_model_qtr):
-        for curr_model in sorted(afr_by_mfr_model_qtr[curr_mfr]):
-            curr_year_quarter = (1, 1)
+    for curr_mfr in afr_by_mfr_model_qtr:
+        for curr_model in afr_by_mfr_model_qtr[curr_mfr]:
             prev_model_quarter_values: tuple[float, int] = (0.0, 0)
             curr_row = 5
-            while afr_by_mfr_model_qtr[curr_mfr][curr_model]:
-                # Remove first entry and display it
-                display_data: dict[str, int | float | str] = afr_by_mfr_model_qtr[curr_mfr][curr_model].pop(0)
-
+            # Walk the quarters in order; popping from the front of the list was quadratic in quarters per model
+            display_data: dict[str, int | float | str]
+            for display_data in afr_by_mfr_model_qtr[curr_mfr][curr_model]:
                 # AFR Value
                 excel_sheet.write(curr_row, curr_col, display_data['afr'], float_format)
 
@@ -524,12 +430,6 @@ def _xlsx_add_data_rows(afr_by_mfr_model_qtr: XlsxVizDataPerDriveModelQuarterTyp
                 # Update values for prev qtr
                 prev_model_quarter_values = (display_data['afr'], display_data['unique_drives_deployed'])
 
-                # Increment current year & quarter
-                if curr_year_quarter[1] < 4:
-                    curr_year_quarter = (curr_year_quarter[0], curr_year_quarter[1] + 1)
-                else:
-                    curr_year_quarter = (curr_year_quarter[0] + 1, 1)
-
                 # Increment display row
                 curr_row += 1
 
@@ -547,26 +447,11 @@ def _xlsx_create_multi_range(total_model_count: int, max_num_data_rows: int, sta
     end_row: int = start_row + max_num_data_rows - 1
     cols_per_drive_model: int = 7
 
-    col_letter_indexes: list[str] = []
-
-    for col_index in range(start_col, (cols_per_drive_model * total_model_count) + start_col, cols_per_drive_model):
-        curr_col_letter_index: str = ""
-        letter_prefix_index: int = col_index // 26
-        if letter_prefix_index > 0:
-            curr_col_letter_index = chr(ord('A') + letter_prefix_index - 1)
-
-        # Now deal with last letter
-        letter_suffix_index: int = col_index % 26
-        curr_col_letter_index += chr(ord('A') + letter_suffix_index)
-        # print(f"Col index {col_index} got suffix index {letter_suffix_index} and letter {chr(ord('@') + letter_suffix_index)}")
-
-        col_letter_indexes.append(curr_col_letter_index)
-
-    #print(f"Column sets: {json.dumps(col_letter_indexes, indent=4, sort_keys=True)}")
     cols_plus_rows: list[str] = []
 
-    for curr_col_letter_index in col_letter_indexes:
-        cols_plus_rows.append(f"{curr_col_letter_index}{start_row}:{curr_col_letter_index}{end_row}")
+    for col_index in range(start_col, (cols_per_drive_model * total_model_count) + start_col, cols_per_drive_model):
+        # xl_range takes zero-indexed rows/columns and reuses xlsxwriter's cached column letters
+        cols_plus_rows.append(xlsxwriter.utility.xl_range(start_row - 1, col_index, end_row - 1, col_index))
 
     multi_range_value:str = " ".join(cols_plus_rows)
 
@@ -741,34 +626,28 @@ def _xlsx_add_year_quarter_rows(num_data_rows: int,
         ),
     )
 
-    curr_year: int = 1
-    curr_quarter: int = 1
-
     for curr_row in range(num_data_rows):
+        # Data row N is year N // 4 + 1, quarter N % 4 + 1 (both 1-based)
+        curr_year: int = curr_row // 4 + 1
+        curr_quarter: int = curr_row % 4 + 1
         excel_sheet.write(curr_row + 5, 0, curr_year, year_quarter_formats[curr_year % 2])
         excel_sheet.write(curr_row + 5, 1, curr_quarter, year_quarter_formats[curr_year % 2])
 
-        curr_quarter += 1
-
-        # Did we roll to next year?
-        if curr_quarter == 5:
-            curr_year += 1
-            curr_quarter = 1
-
 
 def _get_total_model_count(quarterly_afr_by_drive_model: XlsxVizDataPerDriveModelQuarterType) -> int:
-    total_models: int = 0
-    for curr_mfr in sorted(quarterly_afr_by_drive_model):
-        total_models += len(quarterly_afr_by_drive_model[curr_mfr])
+    total_models: int = sum(len(curr_mfr_models) for curr_mfr_models in quarterly_afr_by_drive_model.values())
 
     return total_models
 
 
 def _get_max_data_row_count(quarterly_afr_by_drive_model: XlsxVizDataPerDriveModelQuarterType) -> int:
-    max_data_rows: int = 0
-    for curr_mfr in sorted(quarterly_afr_by_drive_model):
-        for curr_model in sorted(quarterly_afr_by_drive_model[curr_mfr]):
-            max_data_rows = max(max_data_rows, len(quarterly_afr_by_drive_model[curr_mfr][curr_model]))
+    max_data_rows: int = max(
+        (
+            len(curr_model_data) for curr_mfr_models in quarterly_afr_by_drive_model.values()
+            for curr_model_data in curr_mfr_models.values()
+        ),
+        default=0
+    )
 
     return max_data_rows
 
@@ -783,7 +662,9 @@ def _generate_output_xlsx(xlsx_path_or_file_handle: str | typing.IO[bytes],
     total_model_count: int = _get_total_model_count(quarterly_afr_by_drive_model)
     max_data_row_count: int = _get_max_data_row_count(quarterly_afr_by_drive_model)
 
-    with xlsxwriter.Workbook(xlsx_path_or_file_handle) as excel_workbook:
+    # Output is only a few hundred columns by a few dozen rows, so keep worksheet data in memory instead of
+    #   letting xlsxwriter spool each sheet to its own temp file before assembling the final file
+    with xlsxwriter.Workbook(xlsx_path_or_file_handle, {'in_memory': True}) as excel_workbook:
         excel_sheet: xlsxwriter.workbook.Worksheet = excel_workbook.add_worksheet()
         _xlsx_add_header_rows(quarterly_afr_by_drive_model, total_model_count, excel_workbook, excel_sheet)
         _xlsx_add_year_quarter_rows(max_data_row_count, excel_workbook, excel_sheet)
@@ -797,8 +678,7 @@ def _generate_output_xlsx(xlsx_path_or_file_handle: str | typing.IO[bytes],
 
 
 def _add_drives_deployed_removed_each_qtr(args: argparse.Namespace,
-                                          source_lazyframe: polars.LazyFrame,
-                                          smart_model_name_mappings_dataframe: polars.DataFrame,
+                                          drives_deployed_removed_dates: polars.DataFrame,
                                           afr_data:polars.DataFrame) -> XlsxVizDataPerDriveModelQuarterType:
 
     print("\nETL pipeline stage 4 of 5: Enrich data with quarterly drive deploys/removals...")
@@ -806,22 +686,9 @@ def _add_drives_deployed_removed_each_qtr(args: argparse.Namespace,
     pipeline_stage_start: float = time.perf_counter()
 
     # Get new deploys per quarter for each drive model
-    drives_deployed_removed_dates: polars.DataFrame = source_lazyframe.join(
-        smart_model_name_mappings_dataframe.lazy(),
-        left_on="model",
-        right_on="drive_model_name_smart",
-    ).group_by(
-        polars.col("drive_model_name_normalized").alias("model_name"),
-        polars.col("serial_number"),
-    ).agg(
-        polars.col("date").min().alias("first_seen"),
-        polars.col("date").max().alias("last_seen")
-    ).collect()
-
     drives_deployed_per_model_per_quarter: polars.DataFrame = drives_deployed_removed_dates.group_by(
         "model_name",
-        polars.col("first_seen").dt.year().alias("deploy_year"),
-        polars.col("first_seen").dt.quarter().alias("deploy_quarter"),
+        _year_quarter_key(polars.col("first_seen")).alias("year_quarter_key"),
     ).agg(
         polars.col("serial_number").count().alias("new_drives")
     )
@@ -833,8 +700,7 @@ def _add_drives_deployed_removed_each_qtr(args: argparse.Namespace,
         polars.col("last_seen").lt( polars.col("last_seen").max() )
     ).group_by(
         "model_name",
-        polars.col("last_seen").dt.year().alias("remove_year"),
-        polars.col("last_seen").dt.quarter().alias("remove_quarter"),
+        _year_quarter_key(polars.col("last_seen")).alias("year_quarter_key"),
     ).agg(
         polars.col("serial_number").count().alias("removed_drives")
     )
@@ -846,21 +712,19 @@ def _add_drives_deployed_removed_each_qtr(args: argparse.Namespace,
     # Add two new columns to afr_data
     enriched_data: polars.DataFrame = afr_data.join(
         drives_deployed_per_model_per_quarter,
-        left_on =  [ "model_name", "year",        "quarter" ],
-        right_on = [ "model_name", "deploy_year", "deploy_quarter"],
+        on = [ "model_name", "year_quarter_key" ],
         how = "left",   # Left join, right table may not have a match
     ).join(
         drives_removed_per_model_per_quarter,
-        left_on =  [ "model_name", "year",        "quarter" ],
-        right_on = [ "model_name", "remove_year", "remove_quarter"],
+        on = [ "model_name", "year_quarter_key" ],
         how = "left",   # Left join, right table may not have a match
     ).select(
         "model_name",
         "year",
         "quarter",
-        polars.col("new_drives").replace({None: 0}).alias("qtr_new_drives"),
+        polars.col("new_drives").fill_null(0).alias("qtr_new_drives"),
         "qtr_unique_drives_deployed",
-        polars.col("removed_drives").replace({None: 0}).alias("qtr_removed_drives"),
+        polars.col("removed_drives").fill_null(0).alias("qtr_removed_drives"),
         "qtr_failure_count",
         "qtr_drive_days",
     ).sort(
@@ -885,63 +749,70 @@ def _add_drives_deployed_removed_each_qtr(args: argparse.Namespace,
 def _create_xlsx_viz_data(args: argparse.Namespace,
                           quarterly_afr_calc_data: polars.DataFrame) -> XlsxVizDataPerDriveModelQuarterType:
 
-    #  Get max year/quarter in the data
-    max_year_quarter: str = "1970 Q1"
-
-    cumulative_quarter_stats: dict[str, dict[str, dict[str, str | int]]] = {}
+    # Input is sorted by normalized model name ("<mfr> <model>"), so mfrs and models get inserted in sorted order.
+    #   All the xlsx helpers rely on that dict order rather than each re-sorting the keys
     afr_by_mfr_model_quarter: XlsxVizDataPerDriveModelQuarterType = {}
 
-    for curr_quarter_data in quarterly_afr_calc_data.iter_rows(named=True):
-        curr_manufacturer, curr_drive_model = curr_quarter_data['model_name'].split()
-        year_quarter: str = f"{curr_quarter_data['year']} Q{curr_quarter_data['quarter']}"
-        max_year_quarter = max(max_year_quarter, year_quarter)
-        # print(f"\tMfr: {curr_manufacturer}, model: {curr_drive_model}, qtr: {year_quarter}")
+    # Split mfr/model and build the year/quarter label as columns so the Python loop only unpacks tuples
+    viz_source_data: polars.DataFrame = quarterly_afr_calc_data.select(
+        polars.col("model_name").cast(polars.String).str.split_exact(" ", 1).struct.rename_fields(
+            [ "manufacturer", "drive_model" ]
+        ).struct.unnest(),
+        polars.concat_str(
+            polars.col("year"),
+            polars.lit(" Q"),
+            polars.col("quarter"),
+        ).alias("year_quarter"),
+        "qtr_new_drives",
+        "qtr_unique_drives_deployed",
+        "qtr_removed_drives",
+        "qtr_failure_count",
 
-        if curr_manufacturer not in cumulative_quarter_stats:
-            cumulative_quarter_stats[curr_manufacturer]: dict[str, dict[str, int]] = {}
-            afr_by_mfr_model_quarter[curr_manufacturer] = {}
-        if curr_drive_model not in cumulative_quarter_stats[curr_manufacturer]:
-            cumulative_quarter_stats[curr_manufacturer][curr_drive_model]: dict[str, str | int] = {
-                'cumulative_drive_days'     : 0,
-                'cumulative_failure_count'  : 0,
-            }
-            afr_by_mfr_model_quarter[curr_manufacturer][curr_drive_model] = []
+        # AFR over running totals per model; rows are in year/quarter order within each model
+        _afr_calc(
+            polars.col("qtr_drive_days").cum_sum().over("model_name"),
+            polars.col("qtr_failure_count").cum_sum().over("model_name"),
+        ).alias("afr"),
+    )
 
-        curr_mfr_model_stats: dict[str, str | int] = cumulative_quarter_stats[curr_manufacturer][curr_drive_model]
+    #  Get max year/quarter in the data ("YYYY Qn" labels sort chronologically)
+    max_year_quarter: str | None = viz_source_data.get_column("year_quarter").max()
 
-        curr_mfr_model_stats['cumulative_drive_days'] += curr_quarter_data['qtr_drive_days']
-        curr_mfr_model_stats['cumulative_failure_count'] += curr_quarter_data['qtr_failure_count']
+    for curr_manufacturer, curr_drive_model, year_quarter, qtr_new_drives, qtr_unique_drives_deployed, \
+            qtr_removed_drives, qtr_failure_count, afr in viz_source_data.iter_rows():
+        # print(f"\tMfr: {curr_manufacturer}, model: {curr_drive_model}, qtr: {year_quarter}")
+
+        curr_mfr_model_afr_data: list[dict[str, str | int | float]] = afr_by_mfr_model_quarter.setdefault(
+            curr_manufacturer, {} ).setdefault(curr_drive_model, [])
 
         # If this quarter has enough drives deployed, add new quarter of AFR data
-        if curr_quarter_data['qtr_unique_drives_deployed'] >= args.min_drives:
-            afr_by_mfr_model_quarter[curr_manufacturer][curr_drive_model].append(
+        if qtr_unique_drives_deployed >= args.min_drives:
+            curr_mfr_model_afr_data.append(
                 {
                     'year_quarter'              : year_quarter,
-                    'qtr_new_drives'            : curr_quarter_data['qtr_new_drives'],
-                    'qtr_removed_drives'        : curr_quarter_data['qtr_removed_drives'],
-                    'unique_drives_deployed'    : curr_quarter_data['qtr_unique_drives_deployed'],
-                    'failure_count'             : curr_quarter_data['qtr_failure_count'],
-                    'afr'                       : _afr_calc( curr_mfr_model_stats['cumulative_drive_days'],
-                                                             curr_mfr_model_stats['cumulative_failure_count'] ),
+                    'qtr_new_drives'            : qtr_new_drives,
+                    'qtr_removed_drives'        : qtr_removed_drives,
+                    'unique_drives_deployed'    : qtr_unique_drives_deployed,
+                    'failure_count'             : qtr_failure_count,
+                    'afr'                       : afr,
                 }
             )
 
-    del cumulative_quarter_stats
-
-    # Data cleanup
-    for curr_mfr in sorted(afr_by_mfr_model_quarter):
-
-        # The list is to get it so we iterate over a list rather than the dict and can delete keys from the dict
-        for curr_model in sorted(list(afr_by_mfr_model_quarter[curr_mfr])):
+    # Data cleanup: drop models whose list of quarterly stats is empty (hence falsy), in one pass that keeps key order
+    afr_by_mfr_model_quarter = {
+        curr_mfr: {
+            curr_model: curr_model_quarters for curr_model, curr_model_quarters in curr_mfr_models.items()
+            if curr_model_quarters
+        }
+        for curr_mfr, curr_mfr_models in afr_by_mfr_model_quarter.items()
+    }
 
-            # If the list of quarterly stats is empty (hence falsy), remove this model from the data dict
-            if not afr_by_mfr_model_quarter[curr_mfr][curr_model]:
-                del afr_by_mfr_model_quarter[curr_mfr][curr_model]
-            else:
-                last_quarter_data = afr_by_mfr_model_quarter[curr_mfr][curr_model][-1]
-                # If the final row of data has the max year & quarter, reset its removed drives to failure count
-                if last_quarter_data['year_quarter'] == max_year_quarter:
-                    last_quarter_data['qtr_removed_drives'] = last_quarter_data['failure_count']
+    for curr_mfr_models in afr_by_mfr_model_quarter.values():
+        for curr_model_quarters in curr_mfr_models.values():
+            last_quarter_data = curr_model_quarters[-1]
+            # If the final row of data has the max year & quarter, reset its removed drives to failure count
+            if last_quarter_data['year_quarter'] == max_year_quarter:
+                last_quarter_data['qtr_removed_drives'] = last_quarter_data['failure_count']
 
     return afr_by_mfr_model_quarter
 
@@ -962,28 +833,43 @@ def _main() -> None:
     processing_start: float = time.perf_counter()
 
     args: argparse.Namespace = _parse_args()
-    original_source_lazyframe: polars.LazyFrame = _source_lazyframe(args)
+    # Every query in this pipeline reads from the same four columns, so project them once up front
+    original_source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args).select(
+        "model",
+        "serial_number",
+        "date",
+        "failure",
+    )
 
-    smart_drive_model_names: polars.Series = _get_smart_drive_model_names(args, original_source_lazyframe)
+    print("\nETL pipeline stage 1 of 5: Retrieve candidate SMART drive model names...")
+    smart_drive_model_names: polars.Series = backblaze_drive_stats_data.get_smart_drive_model_names(
+        args, original_source_lazyframe)
 
     smart_model_name_mappings_dataframe: polars.DataFrame = _get_smart_drive_model_mappings(smart_drive_model_names)
 
     # Can delete SMART drive model name series as its no longer used
     del smart_drive_model_names
 
-    afr_by_mfr_model_quarter: polars.DataFrame = _do_quarterly_afr_calculations(original_source_lazyframe, 
-                                                                                smart_model_name_mappings_dataframe )
+    drive_model_daily_lazyframe: polars.LazyFrame = _drive_model_daily_lazyframe(
+        original_source_lazyframe, smart_model_name_mappings_dataframe)
+
+    afr_by_mfr_model_quarter: polars.DataFrame
+    drives_deployed_removed_dates: polars.DataFrame
+    afr_by_mfr_model_quarter, drives_deployed_removed_dates = _do_quarterly_afr_calculations(
+        drive_model_daily_lazyframe)
 
     # Add drives deployed and removed each quarter to our dataframe
     viz_data_by_mfr_model_quarter: XlsxVizDataPerDriveModelQuarterType = _add_drives_deployed_removed_each_qtr(
-        args, original_source_lazyframe, smart_model_name_mappings_dataframe, afr_by_mfr_model_quarter)
+        args, drives_deployed_removed_dates, afr_by_mfr_model_quarter)
+
+    # Per-drive dates are one row per drive, so release them before building the XLSX
+    del drives_deployed_removed_dates
 
     if args.output_xlsx.startswith("s3://"):
-        with tempfile.TemporaryFile(suffix=".xlsx") as tempfile_handle:
-            _generate_output_xlsx(tempfile_handle, viz_data_by_mfr_model_quarter)
-            tempfile_handle.seek(0)
-            binary_content: bytes = tempfile_handle.read()
-        _copy_to_s3(binary_content, args.output_xlsx)
+        # Build the workbook in memory and upload the bytes directly, no round trip through a temp file
+        xlsx_buffer: io.BytesIO = io.BytesIO()
+        _generate_output_xlsx(xlsx_buffer, viz_data_by_mfr_model_quarter)
+        _copy_to_s3(xlsx_buffer.getvalue(), args.output_xlsx)
     else:
         _generate_output_xlsx(args.output_xlsx, viz_data_by_mfr_model_quarter )
 
@@ -1,5 +1,4 @@
 import argparse
-import json
 import time
 import polars
 
@@ -32,6 +31,7 @@ def _parse_args() -> argparse.Namespace:
 
     default_deploy_count_min: int = 500
     parser.add_argument("--deploy-count-min",
+                        type=int,
                         default=default_deploy_count_min,
                         help=f"Minimum quarterly deploy count to display (default: {default_deploy_count_min})")
 
@@ -48,16 +48,12 @@ def _parse_args() -> argparse.Namespace:
 
 
 def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
-    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
-    with open(args.drive_patterns_json, "r") as json_handle:
-        drive_model_patterns: list[str] = json.load(json_handle)
-    print(f"\nRetrieved {len(drive_model_patterns):,} regexes for SMART drive model names from "
-        f"\"{args.drive_patterns_json}\"")
+    source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args)
 
-    multi_regex_pattern: str = "|".join(drive_model_patterns)
-    # print(f"multi regex pattern: {multi_regex_pattern}")
+    # Read in drive model regexes and use them to filter rows coming in from Iceberg in the lazyframe query plan
+    multi_regex_pattern: str = backblaze_drive_stats_data.drive_model_multi_regex(args)
 
-    return backblaze_drive_stats_data.source_lazyframe(args).select(
+    return source_lazyframe.select(
         polars.col("model").alias("model_name"),
         "serial_number",
         "date"
@@ -91,42 +87,59 @@ def _get_model_deployments_per_qtr(lf: polars.LazyFrame, args: argparse.Namespac
 
     operation_start: float = time.perf_counter()
 
+    # Keep the deploy quarter as integer year/quarter columns through the aggregations; the "YYYY Qn" display
+    #   string is only built for the handful of rows that survive to the output
     lf = lf.group_by(
         "model_name",
         "serial_number",
     ).agg(
-        polars.concat_str(
-            [
-                polars.col("date").min().dt.year(),
-                polars.col("date").min().dt.quarter(),
-            ],
-            separator=" Q"
-        ).alias("deployed_year_quarter"),
+        polars.col("date").min().dt.year().alias("deployed_year"),
+        polars.col("date").min().dt.quarter().alias("deployed_quarter"),
+    )
+
+    # Count deploys per SMART model name first, so the mfr/model regexes below run once per model and quarter
+    #   rather than once per drive
+    lf = lf.group_by(
+        "deployed_year",
+        "deployed_quarter",
+        "model_name",
+    ).agg(
+        polars.col("serial_number").count().alias("drives_deployed_this_qtr")
     )
 
     drive_deployed_per_quarter: polars.DataFrame = _add_mfr_and_model_columns(
         lf
-    ).select(
-        "deployed_year_quarter",
-        "drive_model_normalized_mfr",
-        "drive_model_normalized_model",
-        "serial_number",
+
+    # Different SMART names can normalize to the same mfr/model (e.g., with and without mfr prefix), so sum them
     ).group_by(
-        "deployed_year_quarter",
+        "deployed_year",
+        "deployed_quarter",
         "drive_model_normalized_mfr",
         "drive_model_normalized_model",
     ).agg(
-        polars.col("serial_number").count().alias("drives_deployed_this_qtr")
+        polars.col("drives_deployed_this_qtr").sum()
     ).filter(
         polars.col("drives_deployed_this_qtr").ge(args.deploy_count_min)
     ).sort(
-        "deployed_year_quarter",
+        "deployed_year",
+        "deployed_quarter",
         "drives_deployed_this_qtr",
         "drive_model_normalized_mfr",
         "drive_model_normalized_model",
 
-        descending=[True, True, False, False]
-    ).collect()
+        descending=[True, True, True, False, False]
+    ).select(
+        polars.concat_str(
+            [
+                "deployed_year",
+                "deployed_quarter",
+            ],
+            separator=" Q"
+        ).alias("deployed_year_quarter"),
+        "drive_model_normalized_mfr",
+        "drive_model_normalized_model",
+        "drives_deployed_this_qtr",
+    ).collect(engine="streaming")
 
     operation_end: float = time.perf_counter()
     operation_duration: float = operation_end - operation_start
@@ -139,22 +152,22 @@ def _get_model_deployments_per_qtr(lf: polars.LazyFrame, args: argparse.Namespac
 def _display_output(drive_deployments_per_quarter: polars.DataFrame) -> None:
     prev_qtr: str | None = None
     drives_this_qtr: int = 0
-    for drive_deployments_per_quarter_row in drive_deployments_per_quarter.iter_rows(named=True):
-        if drive_deployments_per_quarter_row['deployed_year_quarter'] != prev_qtr:
+    for deployed_year_quarter, drive_mfr, drive_model, drives_deployed_this_qtr in \
+            drive_deployments_per_quarter.iter_rows():
+        if deployed_year_quarter != prev_qtr:
             if prev_qtr is not None:
                 print("\t\t                            -------")
                 print(f"\t\t                            {drives_this_qtr:7,}")
 
-            print(f"\n\t{drive_deployments_per_quarter_row['deployed_year_quarter']}")
-            prev_qtr = drive_deployments_per_quarter_row['deployed_year_quarter']
+            print(f"\n\t{deployed_year_quarter}")
+            prev_qtr = deployed_year_quarter
             drives_this_qtr = 0
 
-        model_str: str = f"{drive_deployments_per_quarter_row['drive_model_normalized_mfr']:8}  " + \
-                         f"{drive_deployments_per_quarter_row['drive_model_normalized_model']:16}"
+        model_str: str = f"{drive_mfr:8}  {drive_model:16}"
 
-        print(f"\t\t{model_str}: {drive_deployments_per_quarter_row['drives_deployed_this_qtr']:7,}")
+        print(f"\t\t{model_str}: {drives_deployed_this_qtr:7,}")
 
-        drives_this_qtr += drive_deployments_per_quarter_row['drives_deployed_this_qtr']
+        drives_this_qtr += drives_deployed_this_qtr
 
     print("\t\t                            -------")
     print(f"\t\t                            {drives_this_qtr:7,}")
@@ -171,7 +184,7 @@ def _main() -> None:
     # print(models_per_qtr)
 
     print(f"\nDrive model deployments per quarter (filtered to >= {args.deploy_count_min:,} drives per model, "
-          "modify filter with --min-deploy-count):")
+          "modify filter with --deploy-count-min):")
     _display_output(model_deployments_per_quarter)
 
     processing_duration: float = time.perf_counter() - processing_start
@@ -60,10 +60,8 @@ def _get_source_lazyframe_with_name_mappings(args: argparse.Namespace) -> polars
 
     print(etl_pipeline.next_stage_banner())
     # update lazyframe with name mappings
-    source_lazyframe = source_lazyframe.join(
-        smart_model_name_mappings_dataframe.lazy(),
-        left_on="model",
-        right_on="drive_model_name_smart",
+    source_lazyframe = backblaze_drive_stats_data.join_smart_drive_model_mappings(
+        source_lazyframe, smart_model_name_mappings_dataframe
     ).select(
         "date",
         "drive_model_name_normalized",
@@ -85,7 +83,7 @@ def _get_materialized_drive_distribution_data(args: argparse.Namespace,
         polars.col("date").dt.year().alias("year"),
         polars.col("date").dt.quarter().alias("quarter"),
     ).agg(
-        polars.col("serial_number").unique().count().alias("unique_serial_numbers"),
+        polars.col("serial_number").n_unique().alias("unique_serial_numbers"),
     ).filter(
         polars.col("unique_serial_numbers").ge(args.min_drives)
     ).select(
@@ -104,7 +102,7 @@ def _get_materialized_drive_distribution_data(args: argparse.Namespace,
             True,
             True,
         ]
-    ).collect()
+    ).collect(engine="streaming")
 
     # print(quarterly_drive_distribution_data)
 
@@ -130,9 +128,7 @@ def _compute_total_drives_per_quarter(quarterly_drive_distribution_data: polars.
 
     for curr_row in total_drives_per_quarter_dataframe.iter_rows():
         year, quarter, total_drives = curr_row
-        if year not in drives_per_quarter:
-            drives_per_quarter[year]: dict[int, int] = {}
-        drives_per_quarter[year][quarter]: int = total_drives
+        drives_per_quarter.setdefault(year, {})[quarter] = total_drives
 
     # for curr_year in sorted(drives_per_quarter):
     #     print(f"\t{curr_year}")
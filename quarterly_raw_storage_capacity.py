@@ -79,7 +79,7 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
         "quarter",
         "model_name",
     ).agg(
-        polars.col("serial_number").unique().count().alias("unique_sn_per_quarter_and_model"),
+        polars.col("serial_number").n_unique().alias("unique_sn_per_quarter_and_model"),
 
         # Mode returns a list of values as there can be a tie of most frequent.
         # There won't be in our case
@@ -102,7 +102,11 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
             "year",
             "quarter",
         ),
-    ).collect()
+
+    # Quarter over quarter change, computed on the sorted column rather than carried along in the print loop
+    ).with_columns(
+        polars.col("raw_storage_eb").diff().alias("delta_eb"),
+    ).collect(engine="streaming")
 
     # print(quarterly_raw_storage_capacity_dataframe)
 
@@ -131,26 +135,23 @@ def _main() -> None:
 
     print("\nBackblaze Raw Storage Capacity By Quarter:\n")
 
-    prev_eb: float = 0
-
     output_rows: list[str] = []
 
     prev_year: int = 2013
     for curr_row in quarterly_raw_storage_capacity_dataframe.iter_rows():
-        year, quarter, raw_capacity_eb = curr_row
+        year, quarter, raw_capacity_eb, delta_eb = curr_row
 
         if year != prev_year:
             output_rows.append("")
             prev_year = year
 
-        if prev_eb != 0:
+        # First quarter has no previous quarter, so no delta
+        if delta_eb is not None:
             output_rows.append(f"\t{year} Q{quarter}: {raw_capacity_eb:5.02f} exabytes (EB) "
-                  f"(delta: {raw_capacity_eb - prev_eb:5.02f} EB)")
+                  f"(delta: {delta_eb:5.02f} EB)")
         else:
             output_rows.append(f"\t{year} Q{quarter}: {raw_capacity_eb:5.02f} exabytes (EB)")
 
-        prev_eb = raw_capacity_eb
-
     # Show from newest to oldest
     for curr_output_row in reversed(output_rows):
         print(curr_output_row)
@@ -84,7 +84,7 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
         "datacenter",
         "model_name",
     ).agg(
-        polars.col("serial_number").unique().count().alias("unique_sn_per_quarter_and_model"),
+        polars.col("serial_number").n_unique().alias("unique_sn_per_quarter_and_model"),
         polars.col("capacity_tb").median().alias("median_capacity_tb"),
     ).with_columns(
         (polars.col("median_capacity_tb") * polars.col("unique_sn_per_quarter_and_model") / tb_per_pb).alias(
@@ -95,18 +95,23 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
         polars.col("total_pb_for_model").sum().alias("raw_storage_pb")
     ).with_columns(
         (polars.col("raw_storage_pb") / pb_per_eb).alias("raw_storage_eb"),
+
+    # Quarterly totals across all datacenters, computed in Polars rather than accumulated row by row
+    ).with_columns(
+        polars.col("raw_storage_eb").sum().over("year", "quarter").alias("qtr_raw_storage_eb"),
     ).select(
         "year",
         "quarter",
         "datacenter",
         "raw_storage_eb",
+        "qtr_raw_storage_eb",
     ).sort(
         (
             "year",
             "quarter",
             "datacenter",
         ),
-    ).collect()
+    ).collect(engine="streaming")
 
     # print(quarterly_raw_storage_capacity_dataframe)
 
@@ -137,25 +142,16 @@ def _main() -> None:
 
     output_rows: list[str] = []
 
-    prev_year_qtr: tuple[int, int] = (2023, 3)
-    year_qtr_datacenters: list[str] = []
-    prev_qtr_cumulative_eb: float = 0
-    for year, quarter, datacenter_iata_code, datacenter_eb in quarterly_raw_storage_capacity_dataframe.iter_rows():
-        # print(f"{year} Q{quarter}")
-        if (year, quarter) != prev_year_qtr:
-            prev_year, prev_quarter = prev_year_qtr
-            output_rows.append(f"\t{prev_year} Q{prev_quarter} ({prev_qtr_cumulative_eb:5.02f} EB): "
-                  f"{", ".join(year_qtr_datacenters)}")
-            year_qtr_datacenters.clear()
-            prev_year_qtr = (year, quarter)
-            prev_qtr_cumulative_eb = 0
-
-        year_qtr_datacenters.append(f"{datacenter_iata_code} = {datacenter_eb:4.02f} EB")
-        prev_qtr_cumulative_eb += datacenter_eb
-
-    # Print out final year and quarter
-    if year_qtr_datacenters:
-        output_rows.append(f"\t{prev_year_qtr[0]} Q{prev_year_qtr[1]} ({prev_qtr_cumulative_eb:5.02f} EB): "
+    for (year, quarter), qtr_dataframe in quarterly_raw_storage_capacity_dataframe.group_by(
+            "year", "quarter", maintain_order=True):
+
+        qtr_raw_storage_eb: float = qtr_dataframe.get_column("qtr_raw_storage_eb").first()
+
+        year_qtr_datacenters: list[str] = []
+        for datacenter_iata_code, datacenter_eb in qtr_dataframe.select("datacenter", "raw_storage_eb").iter_rows():
+            year_qtr_datacenters.append(f"{datacenter_iata_code} = {datacenter_eb:4.02f} EB")
+
+        output_rows.append(f"\t{year} Q{quarter} ({qtr_raw_storage_eb:5.02f} EB): "
               f"{", ".join(year_qtr_datacenters)}")
 
     for curr_year_qtr in reversed(output_rows):
@@ -54,11 +54,10 @@ def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
 
     source_lazyframe: polars.LazyFrame = backblaze_drive_stats_data.source_lazyframe(args)
 
-    source_lazyframe = source_lazyframe.join(
-        # Join with normalized name mapping dataframe to reduce to drives of interest
-        backblaze_drive_stats_data.get_smart_drive_model_mappings(args, source_lazyframe).lazy(),
-        left_on="model",
-        right_on="drive_model_name_smart",
+    # Join with normalized name mapping dataframe to reduce to drives of interest
+    source_lazyframe = backblaze_drive_stats_data.join_smart_drive_model_mappings(
+        source_lazyframe,
+        backblaze_drive_stats_data.get_smart_drive_model_mappings(args, source_lazyframe),
 
     # Reduce to columns we care about
     ).select(
@@ -92,17 +91,14 @@ def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
         polars.col("capacity_tb_normalized").alias("capacity_tb"),
         "serial_number"
 
-    # Give one row per SN per quarter
-    ).unique(
-
-    # Aggregate number of drives per quarter per model
+    # Aggregate number of distinct drives per quarter per model
     ).group_by(
         "year",
         "quarter",
         "model_name",
         "capacity_tb",
     ).agg(
-        polars.col("serial_number").count().alias("drives_deployed"),
+        polars.col("serial_number").n_unique().alias("drives_deployed"),
 
     # Do the math to compute PB per quarter per model
     ).select(
@@ -110,10 +106,8 @@ def _get_source_lazyframe(args: argparse.Namespace) -> polars.LazyFrame:
         "quarter",
         "model_name",
         (polars.col("capacity_tb") * polars.col("drives_deployed") / tb_per_pb).alias("model_cumulative_raw_pb"),
-    ).sort(
-        "year",
-        "quarter",
-        "model_name",
+
+    # No sort here: the per-mfr rollup re-aggregates these rows and sorts its much smaller result
     )
 
     # print(source_lazyframe.collect_schema())
@@ -134,7 +128,7 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
     quarterly_raw_storage_capacity_dataframe: polars.DataFrame = source_lazyframe.select(
         "year",
         "quarter",
-        polars.col("model_name").str.split(" ").list.first().alias("drive_mfr"),
+        polars.col("model_name").cast(polars.String).str.split(" ").list.first().alias("drive_mfr"),
         "model_cumulative_raw_pb",
     ).group_by(
         "year",
@@ -142,13 +136,19 @@ def _get_materialized_quarterly_storage_capacity(source_lazyframe: polars.LazyFr
         "drive_mfr",
     ).agg(
         polars.col("model_cumulative_raw_pb").sum().alias("raw_capacity_pb")
+
+    # Quarterly totals and each mfr's share of them, computed in Polars rather than accumulated row by row
+    ).with_columns(
+        polars.col("raw_capacity_pb").sum().over("year", "quarter").alias("qtr_raw_capacity_pb"),
+    ).with_columns(
+        (polars.col("raw_capacity_pb") / polars.col("qtr_raw_capacity_pb") * 100.0).alias("qtr_capacity_percent"),
     ).sort(
         (
             "year",
             "quarter",
             "drive_mfr",
         ),
-    ).collect()
+    ).collect(engine="streaming")
 
     # print(quarterly_raw_storage_capacity_dataframe)
 
@@ -179,41 +179,22 @@ def _main() -> None:
 
     output_rows: list[str] = []
 
-    prev_year_qtr: tuple[int, int] = (0, 0)
-    prev_year_data: list[tuple[str, float]] = []
-    prev_year_pb: float = 0
-
-    for curr_row in quarterly_raw_storage_capacity_dataframe.iter_rows():
-        year, quarter, drive_mfr, raw_capacity_pb = curr_row
+    for (year, quarter), qtr_dataframe in quarterly_raw_storage_capacity_dataframe.group_by(
+            "year", "quarter", maintain_order=True):
 
-        if (year, quarter) != prev_year_qtr:
-            # Do we have data to output?
-            if prev_year_data:
-                detailed_data: list[str] = []
-                for curr_mfr_qtr in prev_year_data:
-                    detailed_data.append(f"{curr_mfr_qtr[0]} = {curr_mfr_qtr[1]:8,.01f} "
-                                         f"({curr_mfr_qtr[1] / prev_year_pb * 100.0:3.0f}%)")
-                output_rows.append(f"\t{prev_year_qtr[0]} Q{prev_year_qtr[1]} (Total = {prev_year_pb:8,.01f}):\t" +
-                                    "    ".join(detailed_data) )
-                prev_year_data.clear()
-                prev_year_pb = 0
+        # If we've rolled into a new year, add a blank line
+        if quarter == 1:
+            output_rows.append("")
 
-            prev_year_qtr = (year, quarter)
+        qtr_raw_capacity_pb: float = qtr_dataframe.get_column("qtr_raw_capacity_pb").first()
 
-            # If we've rolled into a new year, add a blank line
-            if quarter == 1:
-                output_rows.append("")
-
-        prev_year_data.append( (drive_mfr, raw_capacity_pb) )
-        prev_year_pb += raw_capacity_pb
-
-    if prev_year_data:
         detailed_data: list[str] = []
-        for curr_mfr_qtr in prev_year_data:
-            detailed_data.append(f"{curr_mfr_qtr[0]} = {curr_mfr_qtr[1]:8,.01f} "
-                                 f"({curr_mfr_qtr[1] / prev_year_pb * 100.0:3.0f}%)")
-        output_rows.append(f"\t{prev_year_qtr[0]} Q{prev_year_qtr[1]} (Total = {prev_year_pb:8,.01f}):\t" +
-                                    "    ".join(detailed_data) )
+        for drive_mfr, raw_capacity_pb, qtr_capacity_percent in qtr_dataframe.select(
+                "drive_mfr", "raw_capacity_pb", "qtr_capacity_percent").iter_rows():
+            detailed_data.append(f"{drive_mfr} = {raw_capacity_pb:8,.01f} ({qtr_capacity_percent:3.0f}%)")
+
+        output_rows.append(f"\t{year} Q{quarter} (Total = {qtr_raw_capacity_pb:8,.01f}):\t" +
+                           "    ".join(detailed_data) )
 
     # Show from newest to oldest
     for curr_output_row in reversed(output_rows):